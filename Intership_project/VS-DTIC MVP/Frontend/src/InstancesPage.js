@@ -1,6 +1,6 @@
 // src/InstancesPage.js
 
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import axios from "axios";
 import styled from "styled-components";
 
@@ -48,18 +48,52 @@ const Button = styled.button`
   }
 `;
 
+const PAGE_SIZE = 100;
+
 const InstancesPage = () => {
   const [instances, setInstances] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
+  const [statusFilter, setStatusFilter] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // Apply instance status changes pushed by the gateway instead of
+  // re-fetching. Only rows already listed are updated: an unknown name may
+  // be on a page not loaded yet or outside the status filter, and shows up
+  // on the next fetch
+  useEffect(() => {
+    const source = new EventSource("/api/events/status?entity=instance");
+    source.addEventListener("status", (e) => {
+      const { entity, name, timestamp, ...changes } = JSON.parse(e.data);
+      setInstances((current) =>
+        current.map((instance) =>
+          instance.instance_name === name
+            ? { ...instance, ...changes }
+            : instance
+        )
+      );
+    });
+    return () => source.close();
+  }, []);
 
-  const fetchAllInstances = async () => {
+  // Lists are paged by the registry; the next page's cursor comes back in
+  // the X-Next-Cursor header
+  const fetchAllInstances = async (cursor = null) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await axios.get("/api/instances");
-      setInstances(response.data);
+      const response = await axios.get("/api/instances", {
+        params: {
+          limit: PAGE_SIZE,
+          status: statusFilter || undefined,
+          cursor: cursor || undefined,
+        },
+      });
+      setInstances((current) =>
+        cursor ? [...current, ...response.data] : response.data
+      );
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (err) {
       setError("Error fetching instances");
     } finally {
@@ -73,6 +107,7 @@ const InstancesPage = () => {
     try {
       const response = await axios.get(`/api/instances/${searchTerm}`);
       setInstances([response.data]);
+      setNextCursor(null);
     } catch (err) {
       setError("Instance not found");
       setInstances([]);
@@ -85,7 +120,13 @@ const InstancesPage = () => {
     <PageContainer>
       <h1>Instances</h1>
       <div>
-        <Button onClick={fetchAllInstances} disabled={loading}>
+        <Input
+          type="text"
+          placeholder="Filter by status"
+          value={statusFilter}
+          onChange={(e) => setStatusFilter(e.target.value)}
+        />
+        <Button onClick={() => fetchAllInstances()} disabled={loading}>
           {loading ? "Loading..." : "Get All Instances"}
         </Button>
       </div>
@@ -110,7 +151,7 @@ const InstancesPage = () => {
         </thead>
         <tbody>
           {instances.map((instance) => (
-            <tr key={instance.id}>
+            <tr key={instance.id ?? instance.instance_name}>
               <Td>{instance.instance_name}</Td>
               <Td>{instance.module_name}</Td>
               <Td>{instance.status}</Td>
@@ -119,6 +160,11 @@ const InstancesPage = () => {
           ))}
         </tbody>
       </Table>
+      {nextCursor && (
+        <Button onClick={() => fetchAllInstances(nextCursor)} disabled={loading}>
+          {loading ? "Loading..." : "Load More"}
+        </Button>
+      )}
     </PageContainer>
   );
 };
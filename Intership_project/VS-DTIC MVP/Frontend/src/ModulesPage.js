@@ -1,6 +1,6 @@
 // src/ModulesPage.js
 
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import axios from "axios";
 import styled from "styled-components";
 
@@ -48,18 +48,50 @@ const Button = styled.button`
   }
 `;
 
+const PAGE_SIZE = 100;
+
 const ModulesPage = () => {
   const [modules, setModules] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
+  const [statusFilter, setStatusFilter] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // Apply module status changes pushed by the gateway instead of re-fetching.
+  // Only rows already listed are updated: an unknown name may be on a page
+  // not loaded yet or outside the status filter, and shows up on the next
+  // fetch
+  useEffect(() => {
+    const source = new EventSource("/api/events/status?entity=module");
+    source.addEventListener("status", (e) => {
+      const { entity, name, timestamp, ...changes } = JSON.parse(e.data);
+      setModules((current) =>
+        current.map((module) =>
+          module.name === name ? { ...module, ...changes } : module
+        )
+      );
+    });
+    return () => source.close();
+  }, []);
 
-  const fetchAllModules = async () => {
+  // Lists are paged by the registry; the next page's cursor comes back in
+  // the X-Next-Cursor header
+  const fetchAllModules = async (cursor = null) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await axios.get("/api/modules");
-      setModules(response.data);
+      const response = await axios.get("/api/modules", {
+        params: {
+          limit: PAGE_SIZE,
+          status: statusFilter || undefined,
+          cursor: cursor || undefined,
+        },
+      });
+      setModules((current) =>
+        cursor ? [...current, ...response.data] : response.data
+      );
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (err) {
       setError("Error fetching modules");
     } finally {
@@ -73,6 +105,7 @@ const ModulesPage = () => {
     try {
       const response = await axios.get(`/api/modules/${searchTerm}`);
       setModules([response.data]);
+      setNextCursor(null);
     } catch (err) {
       setError("Module not found");
       setModules([]);
@@ -85,7 +118,13 @@ const ModulesPage = () => {
     <PageContainer>
       <h1>Modules</h1>
       <div>
-        <Button onClick={fetchAllModules} disabled={loading}>
+        <Input
+          type="text"
+          placeholder="Filter by status"
+          value={statusFilter}
+          onChange={(e) => setStatusFilter(e.target.value)}
+        />
+        <Button onClick={() => fetchAllModules()} disabled={loading}>
           {loading ? "Loading..." : "Get All Modules"}
         </Button>
       </div>
@@ -109,7 +148,7 @@ const ModulesPage = () => {
         </thead>
         <tbody>
           {modules.map((module) => (
-            <tr key={module.id}>
+            <tr key={module.id ?? module.name}>
               <Td>{module.name}</Td>
               <Td>{module.description}</Td>
               <Td>{module.status}</Td>
@@ -117,6 +156,11 @@ const ModulesPage = () => {
           ))}
         </tbody>
       </Table>
+      {nextCursor && (
+        <Button onClick={() => fetchAllModules(nextCursor)} disabled={loading}>
+          {loading ? "Loading..." : "Load More"}
+        </Button>
+      )}
     </PageContainer>
   );
 };
@@ -0,0 +1,2 @@
+# Code shared by every service. Images are built from the project root so
+# this package can be copied next to each service's own files.
@@ -0,0 +1,11 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from common.db_config import DATABASE_URL, engine_options
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+# expire_on_commit=False keeps attributes readable after commit without
+# another round trip, which an AsyncSession could not do implicitly anyway
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_engine():
+    await engine.dispose()
@@ -0,0 +1,231 @@
+# Fetches single files from git repositories through a local cache of bare
+# mirrors, one per URL. A mirror holds only the tip commit and its trees
+# (shallow, blob:none partial clone); the blobs of the requested paths are
+# fetched on demand, so a request never downloads the rest of the repo.
+import os
+import time
+import shutil
+import fcntl
+import hashlib
+import logging
+import posixpath
+import tempfile
+import subprocess
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+GIT_CACHE_DIR = os.environ.get("GIT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "git_cache"))
+# Least recently used mirrors are removed once the cache grows past this
+GIT_CACHE_MAX_BYTES = int(os.environ.get("GIT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+GIT_TIMEOUT = float(os.environ.get("GIT_TIMEOUT", 300))
+
+# Ref the fetched tip of the remote's default branch is kept under
+CACHE_REF = "refs/cache/head"
+
+# When each mirror's last fetch started in this process. A request that
+# waited on the lock while another fetched the same URL reuses that fetch,
+# since it began after the request arrived.
+fetch_started = {}
+
+# Mirror sizes in bytes, measured after this process fetched them or when
+# eviction first saw them, so eviction does not re-walk unchanged mirrors
+mirror_sizes = {}
+
+
+def mirror_path(url):
+    return os.path.join(GIT_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest()[:16] + ".git")
+
+
+def git(git_dir, *args, **kwargs):
+    return subprocess.run(
+        ["git", "--git-dir", git_dir, *args],
+        check=True, capture_output=True, text=True, timeout=GIT_TIMEOUT, **kwargs,
+    ).stdout
+
+
+@contextmanager
+def url_lock(mirror, blocking=True):
+    # flock works between threads (each call opens its own file) and between
+    # services sharing GIT_CACHE_DIR on a volume. The lock file is deleted
+    # along with its mirror, so a lock taken on a file that was unlinked
+    # meanwhile is dropped and the new file at the path locked instead.
+    path = mirror + ".lock"
+    while True:
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            yield False
+            return
+        try:
+            current = os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        lock_file.close()
+    try:
+        yield True
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def remove_lock(mirror):
+    # Only while holding url_lock(mirror), once the mirror itself is gone
+    try:
+        os.remove(mirror + ".lock")
+    except FileNotFoundError:
+        pass
+
+
+def fetch(url, mirror):
+    if not os.path.isdir(mirror):
+        git(mirror, "init", "--bare", "--quiet")
+        git(mirror, "remote", "add", "origin", url)
+        # Lets later reads fetch the blobs they need from origin
+        git(mirror, "config", "remote.origin.promisor", "true")
+        git(mirror, "config", "remote.origin.partialclonefilter", "blob:none")
+    git(mirror, "fetch", "--quiet", "--depth", "1", "--filter=blob:none", "origin", "HEAD")
+    git(mirror, "update-ref", CACHE_REF, "FETCH_HEAD")
+
+
+def refresh(url, mirror, requested):
+    """Fetch unless a fetch that started after requested already ran.
+
+    Returns whether this call fetched.
+    """
+    if fetch_started.get(url, 0) >= requested and os.path.isdir(mirror):
+        return False
+    started = time.time()
+    try:
+        fetch(url, mirror)
+    except Exception as exc:
+        logger.error(f"Fetching {url} failed: {getattr(exc, 'stderr', None) or exc}")
+        # A half-initialised mirror would fail every later request
+        if not git_ok(mirror):
+            shutil.rmtree(mirror, ignore_errors=True)
+            remove_lock(mirror)
+        raise
+    fetch_started[url] = started
+    mirror_sizes[mirror] = directory_size(mirror)
+    return True
+
+
+def git_ok(mirror):
+    try:
+        git(mirror, "rev-parse", "--verify", "--quiet", CACHE_REF)
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def repo_path(path):
+    """path relative to the repository root, or None if it leads outside it."""
+    path = posixpath.normpath(path.replace("\\", "/")).lstrip("/")
+    if path in ("", ".", "..") or path.startswith("../"):
+        return None
+    return path
+
+
+def checked_out_file(directory, path):
+    """Where checkout_files put path, or None if path is outside the repo.
+
+    Callers use this rather than joining path themselves, so "../x" never
+    resolves to a file next to the checkout.
+    """
+    path = repo_path(path)
+    return None if path is None else os.path.join(directory, path)
+
+
+def checkout(mirror, paths, target):
+    # Only paths present in the tip are checked out; the caller reports the
+    # missing ones, including paths outside the repository, which ls-tree
+    # would reject. The tree listing needs no blobs.
+    paths = [path for path in map(repo_path, paths) if path is not None]
+    if not paths:
+        return
+    listed = git(mirror, "ls-tree", "-r", "--name-only", CACHE_REF, "--", *paths).splitlines()
+    present = [path for path in dict.fromkeys(paths) if path in listed]
+    if not present:
+        return
+    # Own index file, so checkouts from the shared mirror never contend
+    # for its index.lock
+    env = dict(os.environ, GIT_INDEX_FILE=os.path.join(target, ".git-index"))
+    git(mirror, "--work-tree", target, "checkout", CACHE_REF, "--", *present, env=env)
+    os.remove(env["GIT_INDEX_FILE"])
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def remove_orphan_lock(mirror):
+    # Lock file left without a mirror, e.g. by an earlier failed first clone
+    with url_lock(mirror, blocking=False) as locked:
+        if locked and not os.path.isdir(mirror):
+            remove_lock(mirror)
+
+
+def evict(keep):
+    """Remove least recently used mirrors until the cache fits its quota."""
+    mirrors = []
+    for name in os.listdir(GIT_CACHE_DIR):
+        path = os.path.join(GIT_CACHE_DIR, name)
+        if name.endswith(".git.lock") and not os.path.isdir(path[:-len(".lock")]):
+            remove_orphan_lock(path[:-len(".lock")])
+        if name.endswith(".git") and os.path.isdir(path):
+            if path not in mirror_sizes:
+                mirror_sizes[path] = directory_size(path)
+            mirrors.append((os.path.getmtime(path), path, mirror_sizes[path]))
+    total = sum(size for _, _, size in mirrors)
+    for _, path, size in sorted(mirrors):
+        if total <= GIT_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        # A mirror in use by someone else is skipped, not waited for
+        with url_lock(path, blocking=False) as locked:
+            if not locked:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            remove_lock(path)
+        mirror_sizes.pop(path, None)
+        logger.info(f"Evicted git mirror {path} ({size} bytes)")
+        total -= size
+
+
+@contextmanager
+def checkout_files(url, paths):
+    """Yield a temporary directory holding paths from the tip of url.
+
+    Paths that do not exist in the repository are simply absent from the
+    directory; look files up with checked_out_file. Concurrent calls for
+    one URL share a single fetch.
+    """
+    os.makedirs(GIT_CACHE_DIR, exist_ok=True)
+    mirror = mirror_path(url)
+    target = tempfile.mkdtemp()
+    try:
+        requested = time.time()
+        with url_lock(mirror):
+            fetched = refresh(url, mirror, requested)
+            checkout(mirror, paths, target)
+            # The directory mtime is the mirror's last use, for eviction
+            os.utime(mirror)
+        # Only a fetch grows the cache, so reads served from the mirror skip
+        # eviction
+        if fetched:
+            evict(keep=mirror)
+        yield target
+    finally:
+        shutil.rmtree(target, ignore_errors=True)
@@ -0,0 +1,64 @@
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.responses import Response
+from starlette.routing import Match
+from common.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUEST_ERRORS
+
+
+def route_template(app, scope):
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight and errors per route.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses are passed through untouched.
+    """
+
+    def __init__(self, app, router_app):
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # Resolved before the request runs, so the in-flight gauge can carry it
+        route = route_template(self.router_app, scope)
+        in_flight = REQUESTS_IN_FLIGHT.labels(scope["method"], route)
+        started = time.perf_counter()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(scope["method"], route).observe(
+                time.perf_counter() - started
+            )
+            if status["code"] >= 400:
+                REQUEST_ERRORS.labels(
+                    scope["method"], route, f"{status['code'] // 100}xx"
+                ).inc()
+
+
+def metrics_endpoint():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def instrument_app(app):
+    """Mount /metrics and per-route request metrics on a FastAPI app."""
+    app.add_middleware(MetricsMiddleware, router_app=app)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
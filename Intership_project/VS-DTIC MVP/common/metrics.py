@@ -0,0 +1,167 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Workers have no web server of their own, so they expose /metrics here
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))
+
+# Labels are route templates, upstream names and status classes only, so the
+# number of series stays fixed no matter how many modules or instances exist
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled by route",
+    ["method", "route"],
+)
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "HTTP responses with a 4xx/5xx status by route",
+    ["method", "route", "status"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to other services",
+    ["upstream"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "upstream_request_errors_total",
+    "Failed calls to other services",
+    ["upstream"],
+)
+QUEUE_CONSUME_LATENCY = Histogram(
+    "queue_consume_latency_seconds",
+    "Time a message spent in the queue before being consumed",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_PUBLISH_LATENCY = Histogram(
+    "queue_publish_duration_seconds",
+    "Time from publishing a message until the broker confirmed it",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+MESSAGE_PROCESSING = Histogram(
+    "message_processing_seconds",
+    "Time spent processing one queue message",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+MESSAGE_ERRORS = Counter(
+    "message_processing_errors_total",
+    "Queue messages whose processing raised",
+    ["queue"],
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "gateway_cache_lookups_total",
+    "Gateway response cache lookups by result (hit, stale_hit, miss)",
+    ["result"],
+)
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "gateway_cache_entries",
+    "Replies currently held in the gateway response cache",
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "gateway_cache_evictions_total",
+    "Gateway cache entries evicted to stay under its size limit",
+)
+RESPONSE_CACHE_INVALIDATIONS = Counter(
+    "gateway_cache_invalidations_total",
+    "Gateway cache entries dropped by status-change events",
+)
+RESPONSE_CACHE_REVALIDATIONS = Counter(
+    "gateway_cache_revalidations_total",
+    "Expired gateway cache entries renewed by a 304 from the upstream",
+)
+BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Gateway circuit breaker state per upstream: 0 closed, 1 half open, 2 open",
+    ["upstream"],
+)
+BREAKER_OPENED = Counter(
+    "circuit_breaker_opened_total",
+    "Times the gateway circuit breaker opened",
+    ["upstream"],
+)
+BREAKER_SHORT_CIRCUITED = Counter(
+    "circuit_breaker_short_circuited_total",
+    "Calls refused by an open circuit breaker",
+    ["upstream"],
+)
+HEDGES_FIRED = Counter(
+    "hedged_requests_total",
+    "Second GET attempts fired because the first was slower than the p95",
+    ["upstream"],
+)
+HEDGES_WON = Counter(
+    "hedged_request_wins_total",
+    "Hedged GETs answered first by the second attempt",
+    ["upstream"],
+)
+PREDICTIONS_COALESCED = Counter(
+    "prediction_requests_coalesced_total",
+    "/get_vs_value requests answered by an identical one already in flight",
+)
+ROW_CACHE_LOOKUPS = Counter(
+    "row_cache_lookups_total",
+    "Row cache lookups by result (hit, negative_hit, miss, coalesced)",
+    ["cache", "result"],
+)
+ROW_CACHE_ENTRIES = Gauge(
+    "row_cache_entries",
+    "Rows currently held in the row cache",
+    ["cache"],
+)
+ROW_CACHE_EVICTIONS = Counter(
+    "row_cache_evictions_total",
+    "Rows evicted from the row cache to stay under its size limit",
+    ["cache"],
+)
+
+
+def observe_upstream(upstream, started, failed):
+    """Record one call to another service; started is a time.monotonic() value."""
+    UPSTREAM_LATENCY.labels(upstream).observe(time.monotonic() - started)
+    if failed:
+        UPSTREAM_ERRORS.labels(upstream).inc()
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics from a background thread for queue workers."""
+    start_http_server(port)
+    logger.info(f"Metrics available on port {port}")
+
+
+@contextmanager
+def observe_message(queue, message):
+    """Time processing of an aio-pika message and how long it waited queued.
+
+    Queue latency needs the publisher to set the message timestamp.
+    """
+    timestamp = message.timestamp
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        waited = (datetime.now(timezone.utc) - timestamp).total_seconds()
+        QUEUE_CONSUME_LATENCY.labels(queue).observe(max(waited, 0.0))
+
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        MESSAGE_ERRORS.labels(queue).inc()
+        raise
+    finally:
+        MESSAGE_PROCESSING.labels(queue).observe(time.perf_counter() - started)
@@ -0,0 +1,78 @@
+import os
+import socket
+import logging
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import insert
+from common.schema import status_events
+
+logger = logging.getLogger(__name__)
+
+HOST = os.environ.get("HOSTNAME") or socket.gethostname()
+# Rows buffered while the database is unreachable; beyond this rows are dropped
+PHASE_BUFFER_MAX = int(os.environ.get("PHASE_BUFFER_MAX", 10000))
+
+# deque appends and pops are thread-safe, so phases timed in threadpool
+# workers can be recorded without a lock
+pending = deque(maxlen=PHASE_BUFFER_MAX)
+
+
+def record_phase(entity, name, phase, started, finished, outcome="ok"):
+    pending.append({
+        "entity": entity,
+        "name": name,
+        "phase": phase,
+        "started_at": started,
+        "finished_at": finished,
+        "duration_seconds": (finished - started).total_seconds(),
+        "outcome": outcome,
+        "host": HOST,
+    })
+
+
+@contextmanager
+def timed_phase(entity, name, phase):
+    """Record how long the block took; an exception marks the phase failed."""
+    started = datetime.utcnow()
+    outcome = "failed"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record_phase(entity, name, phase, started, datetime.utcnow(), outcome)
+
+
+def flush_phases(connection):
+    """Write every buffered phase with one multi-row INSERT.
+
+    Takes a sync Connection; async callers use connection.run_sync. Failures
+    are logged and the rows kept for the next flush, since timings must
+    never fail the job they describe.
+    """
+    rows = []
+    while pending:
+        rows.append(pending.popleft())
+    if not rows:
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(insert(status_events), rows)
+    except Exception as e:
+        logger.error(f"Failed to write {len(rows)} phase timings: {e}")
+        # extendleft on a full deque would push out the newest rows, so only
+        # the newest failed rows that still fit go back, ahead of the rest
+        room = PHASE_BUFFER_MAX - len(pending)
+        if room < len(rows):
+            dropped = len(rows) - max(room, 0)
+            logger.warning(f"Phase buffer full, dropped the {dropped} oldest phase timings")
+            rows = rows[dropped:]
+        pending.extendleft(reversed(rows))
+
+
+def flush_phases_with(engine):
+    try:
+        with engine.begin() as connection:
+            flush_phases(connection)
+    except Exception as e:
+        logger.error(f"Failed to write phase timings: {e}")
@@ -0,0 +1,105 @@
+# One long-lived RabbitMQ connection per process for everything it
+# publishes, with a small pool of confirm-mode channels. Publishes are
+# spread round robin over the channels; concurrent publishes on a channel
+# are pipelined and the broker acknowledges them in batches.
+import os
+import json
+import time
+import asyncio
+import logging
+import itertools
+from datetime import datetime, timezone
+import aio_pika
+from common.metrics import QUEUE_PUBLISH_LATENCY
+
+logger = logging.getLogger(__name__)
+
+RABBITMQ_URL = os.environ.get("RABBITMQ_URL", "amqp://rabbitmq:5672")
+PUBLISH_CHANNELS = int(os.environ.get("RABBITMQ_PUBLISH_CHANNELS", 4))
+# Seconds to wait for the broker to confirm a message
+PUBLISH_TIMEOUT = float(os.environ.get("RABBITMQ_PUBLISH_TIMEOUT", 10))
+
+# Work queues, declared exactly like the workers consuming them do
+WORK_QUEUES = ("module_queue", "instance_queue", "prediction_queue")
+
+
+class Publisher:
+    def __init__(self, url=RABBITMQ_URL, channels=PUBLISH_CHANNELS):
+        self.url = url
+        self.size = channels
+        self.connection = None
+        self.channels = []
+        self.next_channel = None
+        self.exchanges = {}
+        # Created on first use, inside the running event loop (Python 3.8
+        # binds a lock to the loop current at construction)
+        self.lock = None
+
+    async def start(self):
+        """Connect and declare the work queues; called at startup.
+
+        An unreachable broker is logged, not raised, and the first publish
+        tries again, so services still start while RabbitMQ is down.
+        """
+        try:
+            await self.connect()
+        except Exception as e:
+            logger.error(f"Failed to connect to RabbitMQ, will retry on publish: {e}")
+
+    async def connect(self):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.connection is not None:
+                return
+            connection = await aio_pika.connect_robust(self.url)
+            try:
+                channels = [await connection.channel(publisher_confirms=True) for _ in range(self.size)]
+                for queue in WORK_QUEUES:
+                    await channels[0].declare_queue(queue, durable=True)
+            except Exception:
+                await connection.close()
+                raise
+            self.connection = connection
+            self.channels = channels
+            self.next_channel = itertools.cycle(channels)
+
+    async def channel(self):
+        if self.connection is None:
+            await self.connect()
+        return next(self.next_channel)
+
+    async def exchange(self, name, type_):
+        # Declared once; the robust connection redeclares it after a reconnect
+        if name not in self.exchanges:
+            channel = await self.channel()
+            self.exchanges[name] = await channel.declare_exchange(name, type_, durable=True)
+        return self.exchanges[name]
+
+    async def publish(self, routing_key, payload, exchange=None, persistent=True):
+        """Publish payload as JSON and wait until the broker confirms it.
+
+        Without exchange the message goes to the work queue routing_key.
+        Raises when the broker cannot be reached or rejects the message.
+        """
+        message = aio_pika.Message(
+            body=json.dumps(payload).encode(),
+            content_type="application/json",
+            timestamp=datetime.now(timezone.utc),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT if persistent else aio_pika.DeliveryMode.NOT_PERSISTENT,
+        )
+        started = time.monotonic()
+        if exchange is None:
+            exchange = (await self.channel()).default_exchange
+        await exchange.publish(message, routing_key=routing_key, timeout=PUBLISH_TIMEOUT)
+        QUEUE_PUBLISH_LATENCY.labels(routing_key or exchange.name).observe(time.monotonic() - started)
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+        self.connection = None
+        self.channels = []
+        self.exchanges = {}
+
+
+publisher = Publisher()
@@ -0,0 +1,145 @@
+# In-process read-through cache of single registry rows keyed by name.
+# Status events from RabbitMQ drop the changed row; the TTLs only bound how
+# long a row can stay stale when an event is lost.
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from common.metrics import ROW_CACHE_ENTRIES, ROW_CACHE_EVICTIONS, ROW_CACHE_LOOKUPS
+
+ROW_CACHE_MAX_ENTRIES = int(os.environ.get("ROW_CACHE_MAX_ENTRIES", 10000))
+ROW_CACHE_TTL = float(os.environ.get("ROW_CACHE_TTL", 300))
+# Missing names are cached too, briefly, so a burst of requests for a name
+# that does not exist yet costs one query instead of one each
+ROW_CACHE_NEGATIVE_TTL = float(os.environ.get("ROW_CACHE_NEGATIVE_TTL", 5))
+
+
+class CachedRow:
+    __slots__ = ("value", "expires")
+
+    def __init__(self, value, ttl):
+        self.value = value
+        self.expires = time.monotonic() + ttl
+
+
+class PendingLoad:
+    __slots__ = ("future", "version")
+
+    def __init__(self, future, version):
+        self.future = future
+        self.version = version
+
+
+class RowCache:
+    """Size-bounded LRU of rows of one entity ("module" or "instance").
+
+    get() runs the loader on a miss; concurrent misses for the same name
+    share one load. Every name carries a version that invalidate() bumps,
+    and a load only stores its result if the version it started under is
+    still current, so a query racing a status change cannot cache the old
+    row. A loader result of None is cached as a negative entry.
+    """
+
+    def __init__(self, name, max_entries=ROW_CACHE_MAX_ENTRIES, ttl=ROW_CACHE_TTL,
+                 negative_ttl=ROW_CACHE_NEGATIVE_TTL):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()
+        self.loading = {}
+        # Versions of names invalidated while a load was in flight; every
+        # other name is at version 0, which keeps this bounded
+        self.versions = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def version(self, key):
+        return self.versions.get(key, 0)
+
+    async def get(self, key, load):
+        """Return the cached row for key, or await load() and cache it."""
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            self.entries.move_to_end(key)
+            if entry.value is None:
+                self.negative_hits += 1
+                ROW_CACHE_LOOKUPS.labels(self.name, "negative_hit").inc()
+            else:
+                self.hits += 1
+                ROW_CACHE_LOOKUPS.labels(self.name, "hit").inc()
+            return entry.value
+
+        pending = self.loading.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            ROW_CACHE_LOOKUPS.labels(self.name, "coalesced").inc()
+            # shield: one waiter being cancelled must not cancel the others
+            return await asyncio.shield(pending.future)
+
+        self.misses += 1
+        ROW_CACHE_LOOKUPS.labels(self.name, "miss").inc()
+        pending = PendingLoad(asyncio.get_running_loop().create_future(), self.version(key))
+        self.loading[key] = pending
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            pending.future.cancel()
+            raise
+        except Exception as exc:
+            pending.future.set_exception(exc)
+            # Retrieve it here so an unawaited failure is not logged as lost
+            pending.future.exception()
+            raise
+        finally:
+            del self.loading[key]
+        if pending.version == self.version(key):
+            self.set(key, value)
+        self.versions.pop(key, None)
+        pending.future.set_result(value)
+        return value
+
+    def set(self, key, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self.entries[key] = CachedRow(value, ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+            ROW_CACHE_EVICTIONS.labels(self.name).inc()
+        ROW_CACHE_ENTRIES.labels(self.name).set(len(self.entries))
+
+    def invalidate(self, key):
+        """Drop key and make any load already in flight for it discard its result."""
+        if key in self.loading:
+            self.versions[key] = self.version(key) + 1
+        if self.entries.pop(key, None) is not None:
+            self.invalidations += 1
+            ROW_CACHE_ENTRIES.labels(self.name).set(len(self.entries))
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (lookups - self.misses) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def status_event_invalidator(caches):
+    """Listener for consume_status_events: drop the named row from caches[entity]."""
+    def invalidate(event):
+        cache = caches.get(event.get("entity"))
+        if cache is not None and event.get("name") is not None:
+            cache.invalidate(event["name"])
+    return invalidate
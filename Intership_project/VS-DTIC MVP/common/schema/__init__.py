@@ -0,0 +1,4 @@
+# Shared registry schema. Tables are created and changed only by the
+# versioned migrations in common/schema/migrations:
+#   python -m common.schema.migrate
+from common.schema.models import Base, Instance, Module, module_images, registry_stats, status_events
@@ -0,0 +1,78 @@
+# Applies pending registry schema migrations. Run it once per deployment,
+# before the services start (docker-compose runs it as the one-shot
+# "migrate" service):
+#
+#   python -m common.schema.migrate
+import os
+import asyncio
+import datetime
+import logging
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select
+from common.db_config import DATABASE_URL, is_in_memory
+from common.schema.migrations import MIGRATIONS
+
+logger = logging.getLogger(__name__)
+
+# No migrate job runs for the SQLite profile, and an in-memory database
+# only lives as long as its process, so services can migrate at startup
+DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", str(is_in_memory(DATABASE_URL))).lower() in ("1", "true", "yes")
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(connection):
+    """Apply every migration not yet recorded, in order; returns their versions."""
+    applied = applied_versions(connection)
+    connection.commit()
+    ran = []
+    for migration in MIGRATIONS:
+        if migration.VERSION in applied:
+            continue
+        logger.info(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+        migration.upgrade(connection)
+        connection.execute(insert(schema_migrations).values(
+            version=migration.VERSION,
+            description=migration.DESCRIPTION,
+            applied_at=datetime.datetime.utcnow(),
+        ))
+        connection.commit()
+        ran.append(migration.VERSION)
+    return ran
+
+
+async def upgrade_engine():
+    from common.database import engine
+    async with engine.connect() as connection:
+        return await connection.run_sync(upgrade)
+
+
+async def auto_upgrade():
+    """Called by the services at startup; migrates only with DB_AUTO_MIGRATE."""
+    if DB_AUTO_MIGRATE:
+        await upgrade_engine()
+
+
+async def main():
+    from common.database import dispose_engine
+    ran = await upgrade_engine()
+    await dispose_engine()
+    if ran:
+        logger.info(f"Applied migrations {', '.join(str(version) for version in ran)}")
+    else:
+        logger.info("Schema is up to date")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    asyncio.run(main())
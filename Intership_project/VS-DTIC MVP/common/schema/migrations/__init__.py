@@ -0,0 +1,15 @@
+# Ordered schema migrations. Add new ones at the end with the next VERSION;
+# never edit one that has been applied.
+from common.schema.migrations import (
+    m0001_initial,
+    m0002_composite_indexes,
+    m0003_module_images,
+    m0004_backfill_registry_stats,
+)
+
+MIGRATIONS = [
+    m0001_initial,
+    m0002_composite_indexes,
+    m0003_module_images,
+    m0004_backfill_registry_stats,
+]
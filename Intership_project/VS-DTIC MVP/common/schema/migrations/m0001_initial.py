@@ -0,0 +1,75 @@
+import datetime
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+)
+
+VERSION = 1
+DESCRIPTION = "Registry tables as the services used to create them"
+
+# Frozen copy of the tables as they stood when each service still ran
+# create_all. Existing databases already have them and are left untouched.
+metadata = MetaData()
+
+Table(
+    "instance_registry",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("instance_name", String(100), index=True),
+    Column("module_name", String(100), index=True),
+    Column("status", String(50), default="Not done"),
+    Column("created_at", DateTime, default=datetime.datetime.utcnow),
+    Column("completed_at", DateTime, nullable=True),
+    Column("container_status", String(50), default="Not running"),
+)
+
+Table(
+    "module_registry",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(255), index=True, unique=True),
+    Column("description", String(500)),
+    Column("status", String(50)),
+    Column("created_at", DateTime, default=datetime.datetime.utcnow),
+    Column("status_updated_at", DateTime, nullable=True),
+)
+
+Table(
+    "registry_stats",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("metric", String(20), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("count", Integer, nullable=False, default=0),
+    Column("total_seconds", Float, nullable=False, default=0.0),
+    Column("max_seconds", Float, nullable=True),
+    UniqueConstraint("entity", "metric", "name", name="uq_registry_stats"),
+)
+
+Table(
+    "status_events",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("phase", String(50), nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=False),
+    Column("outcome", String(20), nullable=False),
+    Column("host", String(255), nullable=False),
+    Index("ix_status_events_timeline", "entity", "name", "started_at"),
+    Index("ix_status_events_phase", "entity", "phase", "duration_seconds"),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,66 @@
+from sqlalchemy import Index, MetaData, Table, func, inspect, select
+
+VERSION = 2
+DESCRIPTION = "Composite indexes for registry queries, unique instance names"
+
+# Depending on which service created instance_registry first, instance_name
+# carries a unique or a plain index; both end up unique here.
+NEW_INDEXES = {
+    "module_registry": [
+        ("ix_module_registry_status_id", ("status", "id")),
+        ("ix_module_registry_created_at", ("created_at",)),
+    ],
+    "instance_registry": [
+        ("ix_instance_registry_module_status", ("module_name", "status")),
+        ("ix_instance_registry_status_id", ("status", "id")),
+        ("ix_instance_registry_container_status_id", ("container_status", "id")),
+        ("ix_instance_registry_created_at", ("created_at",)),
+    ],
+}
+
+# Covered by the primary keys and by ix_instance_registry_module_status
+REDUNDANT_INDEXES = {
+    "module_registry": ["ix_module_registry_id"],
+    "instance_registry": ["ix_instance_registry_id", "ix_instance_registry_module_name"],
+}
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    metadata = MetaData()
+    instances = Table("instance_registry", metadata, autoload_with=connection)
+
+    duplicates = connection.execute(
+        select(instances.c.instance_name)
+        .group_by(instances.c.instance_name)
+        .having(func.count() > 1)
+    ).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "instance_registry has duplicate instance names, resolve them before "
+            f"migrating: {', '.join(str(name) for name in duplicates[:20])}"
+        )
+
+    existing = {ix["name"]: ix for ix in inspector.get_indexes("instance_registry")}
+    name_index = existing.get("ix_instance_registry_instance_name")
+    if name_index is None or not name_index["unique"]:
+        if name_index is not None:
+            Index("ix_instance_registry_instance_name", instances.c.instance_name).drop(connection)
+        Index("ix_instance_registry_instance_name", instances.c.instance_name, unique=True).create(connection)
+
+    # Every step checks the current state first: MySQL commits DDL
+    # implicitly, so a failed run must be safe to repeat
+    for table_name, indexes in NEW_INDEXES.items():
+        table = Table(table_name, metadata, autoload_with=connection)
+        existing = {ix["name"] for ix in inspector.get_indexes(table_name)}
+        for name, columns in indexes:
+            if name not in existing:
+                Index(name, *[table.c[column] for column in columns]).create(connection)
+
+    for table_name, names in REDUNDANT_INDEXES.items():
+        table = Table(table_name, metadata, autoload_with=connection)
+        existing = {ix["name"]: ix for ix in inspector.get_indexes(table_name)}
+        for name in names:
+            if name in existing:
+                columns = existing[name]["column_names"]
+                Index(name, *[table.c[column] for column in columns]).drop(connection)
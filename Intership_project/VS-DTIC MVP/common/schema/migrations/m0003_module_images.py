@@ -0,0 +1,23 @@
+import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+VERSION = 3
+DESCRIPTION = "Content-addressed index of module images"
+
+metadata = MetaData()
+
+Table(
+    "module_images",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("content_hash", String(64), nullable=False, unique=True),
+    Column("image", String(255), nullable=False),
+    Column("image_id", String(100), nullable=False),
+    Column("repo_digest", String(255), nullable=True),
+    Column("created_at", DateTime, nullable=False, default=datetime.datetime.utcnow),
+    Column("last_used_at", DateTime, nullable=False, default=datetime.datetime.utcnow),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
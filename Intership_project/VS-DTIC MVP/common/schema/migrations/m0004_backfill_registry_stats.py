@@ -0,0 +1,96 @@
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, delete, func, insert, select
+
+VERSION = 4
+DESCRIPTION = "Fill registry_stats from the existing modules and instances"
+
+# registry_stats was created empty next to registries that already held
+# rows, so the first status change of an old row took its status below
+# zero. Rebuilding it once gives the incremental updates real counts to
+# start from; on a new database this finds nothing to count.
+#
+# Frozen copy of common.stats_rollup.recompute and of the columns it reads,
+# so replaying this migration always does what it did when first applied.
+metadata = MetaData()
+
+module_registry = Table(
+    "module_registry",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("status", String(50)),
+    Column("created_at", DateTime),
+    Column("status_updated_at", DateTime),
+)
+
+instance_registry = Table(
+    "instance_registry",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("module_name", String(100)),
+    Column("status", String(50)),
+    Column("created_at", DateTime),
+    Column("completed_at", DateTime),
+)
+
+registry_stats = Table(
+    "registry_stats",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("metric", String(20), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("count", Integer, nullable=False),
+    Column("total_seconds", Float, nullable=False),
+    Column("max_seconds", Float, nullable=True),
+)
+
+# (entity, table, start column, end column, duration name)
+DURATIONS = [
+    ("module", module_registry, "created_at", "status_updated_at", "build"),
+    ("instance", instance_registry, "created_at", "completed_at", "training"),
+]
+
+
+def counter(entity, metric, name, count, total_seconds=0.0, max_seconds=None):
+    return {
+        "entity": entity,
+        "metric": metric,
+        "name": name,
+        "count": count,
+        "total_seconds": total_seconds,
+        "max_seconds": max_seconds,
+    }
+
+
+def upgrade(connection):
+    rows = []
+    for entity, table in (("module", module_registry), ("instance", instance_registry)):
+        query = (
+            select(table.c.status, func.count(table.c.id))
+            .where(table.c.status.isnot(None))
+            .group_by(table.c.status)
+        )
+        rows += [counter(entity, "status", status, count) for status, count in connection.execute(query)]
+
+    query = (
+        select(instance_registry.c.module_name, func.count(instance_registry.c.id))
+        .where(instance_registry.c.module_name.isnot(None))
+        .group_by(instance_registry.c.module_name)
+    )
+    rows += [counter("instance", "module", module_name, count) for module_name, count in connection.execute(query)]
+
+    # Date arithmetic differs per database, so durations are summed here
+    for entity, table, start, end, name in DURATIONS:
+        start, end = table.c[start], table.c[end]
+        query = select(start, end).where(start.isnot(None), end.isnot(None))
+        count, total, longest = 0, 0.0, None
+        for started, finished in connection.execute(query):
+            seconds = (finished - started).total_seconds()
+            count += 1
+            total += seconds
+            longest = seconds if longest is None else max(longest, seconds)
+        if count:
+            rows.append(counter(entity, "duration", name, count, total, longest))
+
+    connection.execute(delete(registry_stats))
+    if rows:
+        connection.execute(insert(registry_stats), rows)
@@ -0,0 +1,108 @@
+import datetime
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Table,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import declarative_base
+
+# The one definition of the registry tables, used by every service. It
+# describes the schema the migrations produce; nothing creates tables from
+# it at runtime. Change it together with a new migration.
+Base = declarative_base()
+
+
+class Instance(Base):
+    __tablename__ = 'instance_registry'
+    __table_args__ = (
+        # Instances of a module, optionally in one status
+        Index("ix_instance_registry_module_status", "module_name", "status"),
+        # status= and container_status= filters on id-ordered pages
+        Index("ix_instance_registry_status_id", "status", "id"),
+        Index("ix_instance_registry_container_status_id", "container_status", "id"),
+        Index("ix_instance_registry_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    instance_name = Column(String(100), index=True, unique=True)
+    module_name = Column(String(100))
+    status = Column(String(50), default="Not done")
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    container_status = Column(String(50), default="Not running")
+
+
+class Module(Base):
+    __tablename__ = 'module_registry'
+    __table_args__ = (
+        Index("ix_module_registry_status_id", "status", "id"),
+        Index("ix_module_registry_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), index=True, unique=True)
+    description = Column(String(500))
+    status = Column(String(50))
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    status_updated_at = Column(DateTime, nullable=True)
+
+
+# Registry statistics, kept current by the services that change a status so
+# /stats never has to scan module_registry or instance_registry. One counter
+# row per (entity, metric, name):
+#   status/<status>      rows of the entity currently in that status
+#   module/<module>      instances created for a module (entity "instance")
+#   duration/build       module build times, status_updated_at - created_at
+#   duration/training    instance training times, completed_at - created_at
+registry_stats = Table(
+    "registry_stats",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("metric", String(20), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("count", Integer, nullable=False, default=0),
+    Column("total_seconds", Float, nullable=False, default=0.0),
+    Column("max_seconds", Float, nullable=True),
+    UniqueConstraint("entity", "metric", "name", name="uq_registry_stats"),
+)
+
+# Append-only history of the phases a build, training or prediction went
+# through (clone, image pull, container run, image build, push, ...), one
+# row per phase. Never updated, so rows are only ever inserted in batches.
+status_events = Table(
+    "status_events",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(20), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("phase", String(50), nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=False),
+    Column("outcome", String(20), nullable=False),
+    Column("host", String(255), nullable=False),
+    Index("ix_status_events_timeline", "entity", "name", "started_at"),
+    # Percentiles walk this index instead of sorting the table
+    Index("ix_status_events_phase", "entity", "phase", "duration_seconds"),
+)
+
+# Content-addressed index of built module images: one row per distinct
+# (module script, normalized requirements), pointing at the image built
+# for it, so an identical module is re-tagged instead of rebuilt.
+module_images = Table(
+    "module_images",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("content_hash", String(64), nullable=False, unique=True),
+    Column("image", String(255), nullable=False),
+    Column("image_id", String(100), nullable=False),
+    Column("repo_digest", String(255), nullable=True),
+    Column("created_at", DateTime, nullable=False, default=datetime.datetime.utcnow),
+    Column("last_used_at", DateTime, nullable=False, default=datetime.datetime.utcnow),
+)
@@ -0,0 +1,106 @@
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from common.schema import Instance, Module, registry_stats
+
+DURATIONS = {"module": "build", "instance": "training"}
+
+# (entity, model, start column, end column) of every tracked duration
+DURATION_COLUMNS = [
+    ("module", Module, Module.created_at, Module.status_updated_at),
+    ("instance", Instance, Instance.created_at, Instance.completed_at),
+]
+
+
+def bump(session, entity, metric, name, count=1, seconds=None):
+    """Add to one counter row, creating it on first use."""
+    stats = registry_stats.c
+    values = {"count": stats.count + count}
+    if seconds is not None:
+        values["total_seconds"] = stats.total_seconds + seconds
+        values["max_seconds"] = case(
+            (or_(stats.max_seconds.is_(None), stats.max_seconds < seconds), seconds),
+            else_=stats.max_seconds,
+        )
+    statement = (
+        update(registry_stats)
+        .where(stats.entity == entity, stats.metric == metric, stats.name == name)
+        .values(**values)
+    )
+    if session.execute(statement).rowcount:
+        return
+    try:
+        # Savepoint, so losing the insert race does not undo the caller's work
+        with session.begin_nested():
+            session.execute(
+                insert(registry_stats).values(
+                    entity=entity,
+                    metric=metric,
+                    name=name,
+                    count=count,
+                    total_seconds=seconds or 0.0,
+                    max_seconds=seconds,
+                )
+            )
+    except IntegrityError:
+        session.execute(statement)
+
+
+def record_transition(session, entity, old_status, new_status, started=None, finished=None):
+    """Move one module or instance between status counters.
+
+    Call it in the transaction that changes the status, with old_status None
+    for a new row. started/finished add the build or training duration; a
+    repeated transition (e.g. a redelivered message) changes nothing.
+    """
+    if old_status == new_status:
+        return
+    if old_status is not None:
+        bump(session, entity, "status", old_status, -1)
+    bump(session, entity, "status", new_status)
+    if started is not None and finished is not None:
+        seconds = (finished - started).total_seconds()
+        bump(session, entity, "duration", DURATIONS[entity], seconds=seconds)
+
+
+def record_new_instance(session, module_name, status):
+    record_transition(session, "instance", None, status)
+    bump(session, "instance", "module", module_name)
+
+
+def recompute(session):
+    """Rebuild registry_stats from module_registry and instance_registry.
+
+    Takes a Session or a Connection; the caller commits.
+    """
+    session.execute(delete(registry_stats))
+    for entity, model in (("module", Module), ("instance", Instance)):
+        query = select(model.status, func.count(model.id)).where(model.status.isnot(None)).group_by(model.status)
+        for status, count in session.execute(query):
+            bump(session, entity, "status", status, count)
+
+    query = (
+        select(Instance.module_name, func.count(Instance.id))
+        .where(Instance.module_name.isnot(None))
+        .group_by(Instance.module_name)
+    )
+    for module_name, count in session.execute(query):
+        bump(session, "instance", "module", module_name, count)
+
+    # Date arithmetic differs per database, so durations are summed here
+    for entity, model, start, end in DURATION_COLUMNS:
+        query = select(start, end).where(start.isnot(None), end.isnot(None))
+        count, total, longest = 0, 0.0, None
+        for started, finished in session.execute(query.execution_options(yield_per=1000)):
+            seconds = (finished - started).total_seconds()
+            count += 1
+            total += seconds
+            longest = seconds if longest is None else max(longest, seconds)
+        if count:
+            session.execute(insert(registry_stats).values(
+                entity=entity,
+                metric="duration",
+                name=DURATIONS[entity],
+                count=count,
+                total_seconds=total,
+                max_seconds=longest,
+            ))
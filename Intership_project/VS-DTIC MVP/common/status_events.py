@@ -0,0 +1,69 @@
+import json
+import asyncio
+import logging
+from datetime import datetime, timezone
+import aio_pika
+from common.publisher import RABBITMQ_URL, publisher
+
+logger = logging.getLogger(__name__)
+
+# Fanout exchange every module/instance status transition is published to.
+# The gateway relays it to SSE clients and uses it to invalidate its caches.
+STATUS_EVENTS_EXCHANGE = "status_events"
+
+
+async def publish_status_event(entity, name, **fields):
+    """Publish a status change for a "module" or "instance".
+
+    fields carries the changed columns, e.g. status="done" or
+    container_status="Running". Failures are logged and swallowed: events
+    are a notification side channel, never a reason to fail the caller.
+    """
+    event = {
+        "entity": entity,
+        "name": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    event.update(fields)
+    try:
+        # Goes over the process's shared publisher connection; events are
+        # transient, the work queue messages are the durable record
+        exchange = await publisher.exchange(STATUS_EVENTS_EXCHANGE, aio_pika.ExchangeType.FANOUT)
+        await publisher.publish("", event, exchange=exchange, persistent=False)
+    except Exception as e:
+        # Drop the cached exchange so the next event declares it again
+        publisher.exchanges.pop(STATUS_EVENTS_EXCHANGE, None)
+        logger.error(f"Failed to publish status event for {entity} '{name}': {e}")
+
+
+async def consume_status_events(callback):
+    """Call callback(event) for every status event, reconnecting forever.
+
+    Each consumer gets a private queue, so every replica sees every event.
+    """
+    while True:
+        try:
+            connection = await aio_pika.connect_robust(RABBITMQ_URL)
+            async with connection:
+                channel = await connection.channel()
+                exchange = await channel.declare_exchange(
+                    STATUS_EVENTS_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+                )
+                # Private queue per replica, removed when it disconnects
+                queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+                await queue.bind(exchange)
+                logger.info("Listening for status events...")
+
+                async for message in queue:
+                    async with message.process():
+                        # A malformed event is logged and acked; letting it
+                        # raise would drop the consumer for the retry delay
+                        try:
+                            callback(json.loads(message.body))
+                        except (ValueError, KeyError, AttributeError, TypeError) as exc:
+                            logger.error(f"Skipping malformed status event {message.body[:200]!r}: {exc}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Status event consumer error, retrying in 5 seconds: {str(exc)}")
+            await asyncio.sleep(5)
@@ -0,0 +1,77 @@
+# benchmark.py
+# Compares the old list serialization path (ORM entities -> __dict__ ->
+# jsonable_encoder -> json) with the column-tuple + orjson path used by
+# server.py. Runs against an in-memory SQLite copy of the registry tables:
+#
+#   python benchmark.py [rows]
+import sys
+import json
+import time
+import datetime
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from schemas import rows_to_dicts
+from common.schema import Base, Instance, Module
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+ROUNDS = 5
+
+def seed(db, rows):
+    now = datetime.datetime.utcnow()
+    db.bulk_insert_mappings(Module, [
+        {"name": f"module_{i}", "description": "benchmark module", "status": "done",
+         "created_at": now, "status_updated_at": now}
+        for i in range(rows)
+    ])
+    db.bulk_insert_mappings(Instance, [
+        {"instance_name": f"instance_{i}", "module_name": f"module_{i}", "status": "Done",
+         "created_at": now, "completed_at": now, "container_status": "Running"}
+        for i in range(rows)
+    ])
+    db.commit()
+
+def orm_path(db, model):
+    # The list endpoints before, line for line: full entities, their
+    # __dict__ (jsonable_encoder drops _sa_instance_state), and the
+    # json.dumps call of FastAPI's JSONResponse
+    rows = db.query(model).all()
+    items = [row.__dict__ for row in rows if '__dict__' in dir(row)]
+    body = json.dumps(
+        jsonable_encoder(items), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+    db.expunge_all()
+    return body
+
+def tuple_path(db, model):
+    columns = list(model.__table__.columns)
+    rows = db.query(*columns).order_by(model.id).all()
+    return orjson.dumps(rows_to_dicts(columns, rows))
+
+def measure(db, func, model):
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func(db, model)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, ROWS)
+
+    for model in (Module, Instance):
+        old = measure(db, orm_path, model)
+        new = measure(db, tuple_path, model)
+        print(f"{model.__tablename__}: {ROWS} rows")
+        print(f"  orm + jsonable_encoder: {old * 1000:8.1f} ms  {ROWS / old:10.0f} rows/s")
+        print(f"  tuples + orjson:        {new * 1000:8.1f} ms  {ROWS / new:10.0f} rows/s")
+        print(f"  speedup: {old / new:.1f}x")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# recompute_stats.py
+# Rebuilds the registry_stats rollup from module_registry and
+# instance_registry, e.g. after a manual data fix or if the counters have
+# drifted. Runs in one transaction, so /stats never sees a half-built table:
+#
+#   docker exec data_registry python recompute_stats.py
+import asyncio
+from common.database import SessionLocal, dispose_engine
+from common.stats_rollup import recompute
+
+async def main():
+    async with SessionLocal() as db:
+        await db.run_sync(recompute)
+        await db.commit()
+    await dispose_engine()
+    print("registry_stats recomputed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
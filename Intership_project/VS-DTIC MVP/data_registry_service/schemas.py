@@ -0,0 +1,45 @@
+# schemas.py
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+# Response models. Every column but id is optional because fields= may
+# project a subset of them.
+
+class ModuleOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    status_updated_at: Optional[datetime] = None
+
+class InstanceOut(BaseModel):
+    id: int
+    instance_name: Optional[str] = None
+    module_name: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    container_status: Optional[str] = None
+
+class LookupRequest(BaseModel):
+    names: List[str]
+    fields: Optional[str] = None
+
+class ModuleLookupOut(BaseModel):
+    items: List[ModuleOut]
+    missing: List[str]
+
+class InstanceLookupOut(BaseModel):
+    items: List[InstanceOut]
+    missing: List[str]
+
+def rows_to_dicts(columns, rows):
+    """Zip plain SQL row tuples with their column names.
+
+    Rows come from column selects, not ORM entities, so nothing goes through
+    the session identity map and no _sa_instance_state is carried along.
+    """
+    keys = [column.name for column in columns]
+    return [dict(zip(keys, row)) for row in rows]
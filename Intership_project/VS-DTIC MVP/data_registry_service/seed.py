@@ -0,0 +1,91 @@
+# seed.py
+# Fills the registry with synthetic modules and instances for throughput
+# benchmarks, then rebuilds registry_stats to match. The same arguments
+# always produce the same rows, so runs can be compared. Works against any
+# DATABASE_URL; with the SQLite file profile the services can share it:
+#
+#   export DATABASE_URL=sqlite+aiosqlite:///bench.db
+#   python seed.py --modules 1000 --instances 100000 --reset
+#   python server.py
+import asyncio
+import argparse
+import datetime
+import random
+import time
+from sqlalchemy import delete, insert
+from common.database import SessionLocal, dispose_engine
+from common.schema import Instance, Module
+from common.schema.migrate import upgrade_engine
+from common.stats_rollup import recompute
+
+# Fixed start time, so reruns do not depend on the clock
+EPOCH = datetime.datetime(2024, 1, 1)
+
+def module_rows(count, rng):
+    for i in range(count):
+        created = EPOCH + datetime.timedelta(minutes=i)
+        done = rng.random() < 0.9
+        yield {
+            "name": f"module_{i}",
+            "description": f"Seeded module {i}",
+            "status": "done" if done else "Not done",
+            "created_at": created,
+            "status_updated_at": created + datetime.timedelta(seconds=rng.randint(30, 600)) if done else None,
+        }
+
+def instance_rows(count, modules, rng):
+    for i in range(count):
+        created = EPOCH + datetime.timedelta(seconds=i)
+        done = rng.random() < 0.8
+        yield {
+            "instance_name": f"instance_{i}",
+            "module_name": f"module_{rng.randrange(modules)}",
+            "status": "Done" if done else "Not done",
+            "created_at": created,
+            "completed_at": created + datetime.timedelta(seconds=rng.randint(5, 300)) if done else None,
+            "container_status": "Running" if done and rng.random() < 0.1 else "Not running",
+        }
+
+async def insert_batches(db, model, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            await db.execute(insert(model), batch)
+            batch = []
+    if batch:
+        await db.execute(insert(model), batch)
+
+async def seed(modules, instances, batch_size=1000, reset=False, random_seed=42):
+    rng = random.Random(random_seed)
+    await upgrade_engine()
+    async with SessionLocal() as db:
+        if reset:
+            await db.execute(delete(Instance))
+            await db.execute(delete(Module))
+        await insert_batches(db, Module, module_rows(modules, rng), batch_size)
+        await insert_batches(db, Instance, instance_rows(instances, max(modules, 1), rng), batch_size)
+        await db.run_sync(recompute)
+        await db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the registry with synthetic rows")
+    parser.add_argument("--modules", type=int, default=1000)
+    parser.add_argument("--instances", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42, help="random seed, same seed gives the same rows")
+    parser.add_argument("--reset", action="store_true", help="delete every module and instance first")
+    args = parser.parse_args()
+
+    async def run():
+        started = time.perf_counter()
+        await seed(args.modules, args.instances, args.batch_size, args.reset, args.seed)
+        elapsed = time.perf_counter() - started
+        await dispose_engine()
+        rows = args.modules + args.instances
+        print(f"Seeded {args.modules} modules and {args.instances} instances in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)")
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
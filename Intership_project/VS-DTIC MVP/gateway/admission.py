@@ -0,0 +1,131 @@
+import math
+import time
+import asyncio
+from collections import deque
+from upstreams import UPSTREAMS, env_int, env_float
+
+# Latency (seconds) above which a call counts as a congestion signal, and the
+# starting concurrency limit for every upstream. Overridable per upstream with
+# GATEWAY_<NAME>_LATENCY_TARGET / GATEWAY_<NAME>_INITIAL_LIMIT.
+LATENCY_TARGETS = {
+    "create_module": 30.0,
+    "instance_creator": 5.0,
+    "prediction_creator": 60.0,
+    "data_registry": 1.0,
+}
+INITIAL_LIMIT = env_int("GATEWAY_INITIAL_LIMIT", 10)
+MIN_LIMIT = env_int("GATEWAY_MIN_LIMIT", 1)
+MAX_LIMIT = env_int("GATEWAY_MAX_LIMIT", 100)
+QUEUE_SIZE = env_int("GATEWAY_QUEUE_SIZE", 50)
+QUEUE_TIMEOUT = env_float("GATEWAY_QUEUE_TIMEOUT", 10.0)
+BACKOFF_RATIO = env_float("GATEWAY_BACKOFF_RATIO", 0.9)
+
+
+class Overloaded(Exception):
+    def __init__(self, status_code, detail, retry_after):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded FIFO wait queue.
+
+    Every successful call under the latency target grows the limit by
+    1/limit (about +1 per limit's worth of calls); an error or a slow call
+    multiplies it by BACKOFF_RATIO. Callers beyond the limit wait in a queue
+    of QUEUE_SIZE for at most QUEUE_TIMEOUT seconds.
+    """
+
+    def __init__(self, name, latency_target, initial_limit=INITIAL_LIMIT):
+        self.name = name
+        self.latency_target = latency_target
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.waiters = deque()
+        self.latency_ewma = None
+        self.rejected = 0
+        self.timed_out = 0
+
+    def retry_after(self):
+        # Rough time for the queue ahead to drain, at least one second
+        latency = self.latency_ewma or 1.0
+        waves = (len(self.waiters) + 1) / max(int(self.limit), 1)
+        return max(1, math.ceil(latency * waves))
+
+    def has_capacity(self):
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self):
+        if self.has_capacity() and not self.waiters:
+            self.in_flight += 1
+            return
+        if len(self.waiters) >= QUEUE_SIZE:
+            self.rejected += 1
+            raise Overloaded(429, f"Too many requests queued for {self.name}", self.retry_after())
+
+        waiter = asyncio.get_event_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=QUEUE_TIMEOUT)
+        except asyncio.CancelledError:
+            self.abandon(waiter)
+            raise
+        if not waiter.done():
+            self.abandon(waiter)
+            self.timed_out += 1
+            raise Overloaded(503, f"Timed out waiting for {self.name}", self.retry_after())
+
+    def abandon(self, waiter):
+        if waiter.done():
+            # The slot was already handed over to this waiter; give it back
+            self.in_flight -= 1
+            self.wake()
+        else:
+            waiter.cancel()
+            self.waiters.remove(waiter)
+
+    def release(self, started, failed=False):
+        latency = time.monotonic() - started
+        self.in_flight -= 1
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+
+        if failed or latency > self.latency_target:
+            self.limit = max(MIN_LIMIT, self.limit * BACKOFF_RATIO)
+        else:
+            self.limit = min(MAX_LIMIT, self.limit + 1.0 / self.limit)
+        self.wake()
+
+    def wake(self):
+        while self.waiters and self.has_capacity():
+            waiter = self.waiters.popleft()
+            self.in_flight += 1
+            waiter.set_result(True)
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "latency_ewma": self.latency_ewma,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+limiters = {}
+for name in UPSTREAMS:
+    prefix = f"GATEWAY_{name.upper()}"
+    limiters[name] = AdaptiveLimiter(
+        name,
+        env_float(f"{prefix}_LATENCY_TARGET", LATENCY_TARGETS[name]),
+        env_int(f"{prefix}_INITIAL_LIMIT", INITIAL_LIMIT),
+    )
+
+
+def get_limiter(name):
+    return limiters[name]
@@ -0,0 +1,87 @@
+import math
+import time
+from upstreams import UPSTREAMS, env_int, env_float
+from admission import Overloaded
+from common.metrics import BREAKER_OPENED, BREAKER_SHORT_CIRCUITED, BREAKER_STATE
+
+# Consecutive failures that open the circuit, and seconds it stays open
+# before a single half-open probe is let through
+FAILURE_THRESHOLD = env_int("GATEWAY_BREAKER_FAILURES", 5)
+RESET_TIMEOUT = env_float("GATEWAY_BREAKER_RESET_TIMEOUT", 10.0)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Values of the circuit_breaker_state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Overloaded):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+        self.set_state(CLOSED)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opened = 0
+        self.short_circuited = 0
+
+    def set_state(self, state):
+        self.state = state
+        BREAKER_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def before_call(self):
+        """Raise CircuitOpen instead of letting the call reach a dead upstream."""
+        if self.state == CLOSED:
+            return
+        remaining = self.opened_at + RESET_TIMEOUT - time.monotonic()
+        if self.state == OPEN and remaining <= 0:
+            self.set_state(HALF_OPEN)
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return
+        self.short_circuited += 1
+        BREAKER_SHORT_CIRCUITED.labels(self.name).inc()
+        raise CircuitOpen(
+            503,
+            f"Circuit open for {self.name}",
+            max(1, math.ceil(remaining)),
+        )
+
+    def cancel_probe(self):
+        # The probe never reached the upstream (e.g. rejected by admission)
+        self.probing = False
+
+    def record(self, failed):
+        self.probing = False
+        if not failed:
+            if self.state != CLOSED:
+                self.set_state(CLOSED)
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= FAILURE_THRESHOLD:
+            if self.state != OPEN:
+                self.opened += 1
+                BREAKER_OPENED.labels(self.name).inc()
+            self.set_state(OPEN)
+            self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+breakers = {name: CircuitBreaker(name) for name in UPSTREAMS}
+
+
+def get_breaker(name):
+    return breakers[name]
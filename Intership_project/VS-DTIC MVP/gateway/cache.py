@@ -0,0 +1,158 @@
+import time
+from collections import OrderedDict
+from upstreams import env_int, env_float
+from common.metrics import (
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_EVICTIONS,
+    RESPONSE_CACHE_INVALIDATIONS,
+    RESPONSE_CACHE_LOOKUPS,
+    RESPONSE_CACHE_REVALIDATIONS,
+)
+
+CACHE_MAX_ENTRIES = env_int("GATEWAY_CACHE_MAX_ENTRIES", 1024)
+
+# (ttl, stale_while_revalidate) in seconds for every cached registry route.
+# A stale entry is still served for the extra window while one background
+# refresh replaces it.
+ROUTE_TTLS = {
+    "/modules": (
+        env_float("GATEWAY_CACHE_TTL_MODULES", 5.0),
+        env_float("GATEWAY_CACHE_SWR_MODULES", 30.0),
+    ),
+    "/modules/{module_name}": (
+        env_float("GATEWAY_CACHE_TTL_MODULE", 10.0),
+        env_float("GATEWAY_CACHE_SWR_MODULE", 60.0),
+    ),
+    "/instances": (
+        env_float("GATEWAY_CACHE_TTL_INSTANCES", 5.0),
+        env_float("GATEWAY_CACHE_SWR_INSTANCES", 30.0),
+    ),
+    "/instances/{instance_name}": (
+        env_float("GATEWAY_CACHE_TTL_INSTANCE", 10.0),
+        env_float("GATEWAY_CACHE_SWR_INSTANCE", 60.0),
+    ),
+    "/stats": (
+        env_float("GATEWAY_CACHE_TTL_STATS", 5.0),
+        env_float("GATEWAY_CACHE_SWR_STATS", 30.0),
+    ),
+}
+
+
+class CacheEntry:
+    __slots__ = ("value", "fresh_until", "stale_until", "collection", "name")
+
+    def __init__(self, value, ttl, stale, collection, name):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale
+        self.collection = collection
+        self.name = name
+
+    def is_fresh(self, now):
+        return now < self.fresh_until
+
+    def is_usable(self, now):
+        return now < self.stale_until
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of upstream JSON replies.
+
+    Entries belong to a collection ("modules" or "instances") and, for
+    single-row routes, to a name, so status-change events can drop exactly
+    the affected rows plus every list of that collection. Expired entries
+    are kept until evicted so they can be revalidated with their ETag.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # Bumped on every invalidation so a fetch that started before the
+        # event cannot write its now outdated reply back into the cache
+        self.generations = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.revalidations = 0
+
+    def get(self, key):
+        """Return (value, needs_refresh) or None when there is no usable entry."""
+        entry = self.entries.get(key)
+        now = time.monotonic()
+        if entry is None or not entry.is_usable(now):
+            self.misses += 1
+            RESPONSE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        self.entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.hits += 1
+            RESPONSE_CACHE_LOOKUPS.labels("hit").inc()
+            return entry.value, False
+        self.stale_hits += 1
+        RESPONSE_CACHE_LOOKUPS.labels("stale_hit").inc()
+        return entry.value, True
+
+    def generation(self, collection):
+        return self.generations.get(collection, 0)
+
+    def peek(self, key):
+        """Return the cached value even when expired, or None."""
+        entry = self.entries.get(key)
+        return None if entry is None else entry.value
+
+    def renew(self, key, route, generation=None):
+        """Restart the TTL of an entry the upstream answered 304 for.
+
+        Returns the cached value, or None when the entry was invalidated or
+        evicted while the conditional request was in flight.
+        """
+        entry = self.entries.get(key)
+        if entry is None or (generation is not None and generation != self.generation(entry.collection)):
+            return None
+        self.set(key, entry.value, route, entry.collection, entry.name)
+        self.revalidations += 1
+        RESPONSE_CACHE_REVALIDATIONS.inc()
+        return entry.value
+
+    def set(self, key, value, route, collection, name=None, generation=None):
+        if generation is not None and generation != self.generation(collection):
+            return
+        ttl, stale = ROUTE_TTLS[route]
+        self.entries[key] = CacheEntry(value, ttl, stale, collection, name)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+            RESPONSE_CACHE_EVICTIONS.inc()
+        RESPONSE_CACHE_ENTRIES.set(len(self.entries))
+
+    def invalidate(self, collection, name=None):
+        """Drop every list of the collection and the rows matching name."""
+        self.generations[collection] = self.generation(collection) + 1
+        for key in [
+            key
+            for key, entry in self.entries.items()
+            if entry.collection == collection
+            and (name is None or entry.name is None or entry.name == name)
+        ]:
+            del self.entries[key]
+            self.invalidations += 1
+            RESPONSE_CACHE_INVALIDATIONS.inc()
+        RESPONSE_CACHE_ENTRIES.set(len(self.entries))
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "revalidations": self.revalidations,
+        }
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from common.status_events import consume_status_events as consume_events
+
+logger = logging.getLogger(__name__)
+
+# Buffered events per SSE client; a client that falls this far behind
+# loses its oldest undelivered events
+SUBSCRIBER_QUEUE_SIZE = 100
+
+listeners = []
+subscribers = set()
+
+
+def add_listener(callback):
+    """Register a callable invoked with every decoded status event."""
+    listeners.append(callback)
+
+
+def subscribe():
+    queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    subscribers.add(queue)
+    return queue
+
+
+def unsubscribe(queue):
+    subscribers.discard(queue)
+
+
+def broadcast(event):
+    for queue in subscribers:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+def dispatch(event):
+    for callback in listeners:
+        try:
+            callback(event)
+        except Exception as exc:
+            logger.error(f"Status event listener failed: {str(exc)}")
+
+
+async def consume_status_events():
+    await consume_events(dispatch)
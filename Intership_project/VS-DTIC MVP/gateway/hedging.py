@@ -0,0 +1,92 @@
+import asyncio
+from collections import deque
+from upstreams import env_bool, env_float, env_int, get_client, get_replicas
+from common.metrics import HEDGES_FIRED, HEDGES_WON
+
+# Hedged GETs: when the first attempt is slower than the recent p95, fire a
+# second one (on another replica when there is one) and keep the first reply
+HEDGE_GETS = env_bool("GATEWAY_HEDGE_GETS", False)
+HEDGE_MIN_DELAY = env_float("GATEWAY_HEDGE_MIN_DELAY", 0.05)
+LATENCY_WINDOW = env_int("GATEWAY_HEDGE_WINDOW", 200)
+
+
+class HedgeStats:
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def p95(self):
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def delay(self):
+        p95 = self.p95()
+        return HEDGE_MIN_DELAY if p95 is None else max(HEDGE_MIN_DELAY, p95)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+            "p95": self.p95(),
+        }
+
+
+hedge_stats = {}
+
+
+def get_hedge_stats(name):
+    if name not in hedge_stats:
+        hedge_stats[name] = HedgeStats()
+    return hedge_stats[name]
+
+
+async def timed_get(client, path, headers):
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    response = await client.get(path, headers=headers)
+    return response, loop.time() - started
+
+
+async def hedged_get(upstream, path, headers=None):
+    primary_client = get_client(upstream)
+    if not HEDGE_GETS:
+        return await primary_client.get(path, headers=headers)
+
+    stats = get_hedge_stats(upstream)
+    stats.requests += 1
+    primary = asyncio.ensure_future(timed_get(primary_client, path, headers))
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=stats.delay())
+        if done:
+            response, latency = primary.result()
+            stats.latencies.append(latency)
+            return response
+
+        others = [client for client in get_replicas(upstream) if client is not primary_client]
+        hedge = asyncio.ensure_future(timed_get(others[0] if others else primary_client, path, headers))
+        stats.hedges += 1
+        HEDGES_FIRED.labels(upstream).inc()
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            # A failed attempt only counts once the other one has failed too
+            if not succeeded and pending:
+                continue
+            task = succeeded[0] if succeeded else done.pop()
+            response, latency = task.result()
+            stats.latencies.append(latency)
+            if task is hedge:
+                stats.hedge_wins += 1
+                HEDGES_WON.labels(upstream).inc()
+            return response
+    finally:
+        for task in pending:
+            task.cancel()
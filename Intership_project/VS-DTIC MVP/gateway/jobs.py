@@ -0,0 +1,79 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from upstreams import env_int, env_float
+from admission import Overloaded
+
+# Finished jobs are kept this long (seconds) for clients to collect them
+JOB_TTL = env_float("GATEWAY_JOB_TTL", 600.0)
+JOB_MAX_ENTRIES = env_int("GATEWAY_JOB_MAX_ENTRIES", 10000)
+# Retry-After (seconds) sent when the table is full of pending jobs
+JOB_RETRY_AFTER = env_int("GATEWAY_JOB_RETRY_AFTER", 5)
+
+
+class Job:
+    __slots__ = ("id", "status", "status_code", "result", "expires_at", "done")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "pending"
+        self.status_code = None
+        self.result = None
+        self.expires_at = None
+        self.done = asyncio.Event()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "status_code": self.status_code,
+            "result": self.result,
+        }
+
+
+class JobStore:
+    """In-memory job table; entries expire JOB_TTL seconds after finishing."""
+
+    def __init__(self, max_entries=JOB_MAX_ENTRIES, ttl=JOB_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.jobs = OrderedDict()
+
+    def create(self):
+        """Add a pending job; raises Overloaded when only pending jobs fill the table."""
+        self.purge()
+        if len(self.jobs) >= self.max_entries:
+            raise Overloaded(503, "Too many jobs pending, try again later", JOB_RETRY_AFTER)
+        job = Job()
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None and job.expires_at is not None and job.expires_at < time.monotonic():
+            del self.jobs[job_id]
+            return None
+        return job
+
+    def finish(self, job, status, status_code, result):
+        job.status = status
+        job.status_code = status_code
+        job.result = result
+        job.expires_at = time.monotonic() + self.ttl
+        job.done.set()
+
+    def purge(self):
+        now = time.monotonic()
+        for job_id in [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.expires_at is not None and job.expires_at < now
+        ]:
+            del self.jobs[job_id]
+        # Over the bound, drop the oldest finished jobs first
+        if len(self.jobs) >= self.max_entries:
+            for job_id in [job_id for job_id, job in self.jobs.items() if job.done.is_set()]:
+                del self.jobs[job_id]
+                if len(self.jobs) < self.max_entries:
+                    break
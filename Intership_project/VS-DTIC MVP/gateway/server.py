@@ -1,65 +1,497 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import httpx
+import json
+import time
+import asyncio
 import logging
+from upstreams import open_clients, close_clients, get_client, env_bool
+from cache import ResponseCache
+from events import add_listener, broadcast, consume_status_events, subscribe, unsubscribe
+from jobs import JobStore
+from admission import Overloaded, get_limiter, limiters
+from breaker import get_breaker, breakers
+from hedging import hedged_get, hedge_stats
+from common.http_metrics import instrument_app
+from common.metrics import observe_upstream
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+instrument_app(app)
 
-# URLs for the microservices correctly formatted
-UPLOAD_MODULE_SERVICE_URL = "http://create-module-service:5000/upload_module"
-CREATE_INSTANCE_SERVICE_URL = "http://instance-creator-service:4000/create_instance"
-GET_VS_VALUE_SERVICE_URL = "http://prediction-creator-service:8000/get_vs_value"
-DATA_REGISTRY_SERVICE_URL = "http://data-registry-service:7000"
+# Pass POST bodies and replies through as raw byte streams instead of
+# decoding and re-encoding the JSON on both legs
+STREAMING_PROXY = env_bool("GATEWAY_STREAMING_PROXY", True)
+
+# Hop-by-hop headers that must not be copied between the two connections
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+}
+
+# Upstream GET reply headers relayed to clients (and kept in the cache)
+PASSTHROUGH_HEADERS = ("x-next-cursor", "link", "etag", "last-modified", "cache-control")
+
+# Seconds between SSE keep-alive comments while a job is still running
+SSE_HEARTBEAT = 15.0
+
+job_store = JobStore()
+response_cache = ResponseCache()
+# Cache keys with a background stale-while-revalidate refresh in flight
+refreshing = set()
+background_tasks = set()
+
+
+def invalidate_on_status_event(event):
+    entity = event.get("entity")
+    if entity in ("module", "instance"):
+        response_cache.invalidate(entity + "s", event.get("name"))
+        response_cache.invalidate("stats")
+
+
+@app.on_event("startup")
+async def startup_event():
+    # One pooled client per upstream, kept alive for the gateway's lifetime
+    await open_clients()
+    add_listener(invalidate_on_status_event)
+    add_listener(broadcast)
+    spawn(consume_status_events())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(background_tasks):
+        task.cancel()
+    await close_clients()
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def admit(upstream):
+    """Pass the circuit breaker and take an admission slot for one call."""
+    breaker = get_breaker(upstream)
+    breaker.before_call()
+    try:
+        await get_limiter(upstream).acquire()
+    except BaseException:
+        breaker.cancel_probe()
+        raise
+    return time.monotonic()
+
+
+def complete(upstream, started, failed):
+    observe_upstream(upstream, started, failed)
+    get_limiter(upstream).release(started, failed)
+    get_breaker(upstream).record(failed)
+
+
+def spawn(coroutine):
+    task = asyncio.ensure_future(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 
 @app.post("/upload_module")
 async def gateway_upload_module(request: Request):
-    return await forward_request(request, UPLOAD_MODULE_SERVICE_URL)
+    return await forward_post(request, "create_module", "/upload_module")
+
+
+@app.post("/upload_module_archive")
+async def gateway_upload_module_archive(request: Request):
+    # Always streamed: the archive is relayed chunk by chunk, never buffered
+    return await stream_request(request, "create_module", "/upload_module_archive")
 
 
 @app.post("/create_instance")
 async def gateway_create_instance(request: Request):
-    return await forward_request(request, CREATE_INSTANCE_SERVICE_URL)
+    return await forward_post(request, "instance_creator", "/create_instance")
 
 
 @app.post("/get_vs_value")
 async def gateway_get_vs_value(request: Request):
-    return await forward_request(request, GET_VS_VALUE_SERVICE_URL)
+    return await forward_post(request, "prediction_creator", "/get_vs_value")
+
+
+@app.post("/get_vs_value/batch")
+async def gateway_get_vs_value_batch(request: Request):
+    return await forward_post(request, "prediction_creator", "/get_vs_value/batch")
 
 
 @app.get("/modules")
-async def get_modules():
-    return await forward_request_to_get(DATA_REGISTRY_SERVICE_URL + "/modules")
+async def get_modules(request: Request):
+    # Pagination, filter and fields= parameters pass straight through
+    return await cached_get(request, "/modules", with_query("/modules", request), "modules")
+
+
+@app.post("/modules/lookup")
+async def lookup_modules(request: Request):
+    # Bulk status for many names in one call; see data_registry for the body
+    return await forward_post(request, "data_registry", "/modules/lookup")
+
+
+@app.get("/modules/{module_name}/timeline")
+async def get_module_timeline(module_name: str):
+    return await forward_request_to_get("data_registry", f"/modules/{module_name}/timeline")
 
 
 @app.get("/modules/{module_name}")
-async def get_module(module_name: str):
-    return await forward_request_to_get(
-        DATA_REGISTRY_SERVICE_URL + f"/modules/{module_name}"
+async def get_module(module_name: str, request: Request):
+    return await cached_get(
+        request, "/modules/{module_name}", f"/modules/{module_name}", "modules", module_name
     )
 
 
 @app.get("/instances")
-async def get_instances():
-    return await forward_request_to_get(DATA_REGISTRY_SERVICE_URL + "/instances")
+async def get_instances(request: Request):
+    return await cached_get(
+        request, "/instances", with_query("/instances", request), "instances"
+    )
+
+
+@app.post("/instances/lookup")
+async def lookup_instances(request: Request):
+    return await forward_post(request, "data_registry", "/instances/lookup")
+
+
+@app.get("/instances/{instance_name}/timeline")
+async def get_instance_timeline(instance_name: str):
+    return await forward_request_to_get("data_registry", f"/instances/{instance_name}/timeline")
 
 
 @app.get("/instances/{instance_name}")
-async def get_instance(instance_name: str):
-    return await forward_request_to_get(
-        DATA_REGISTRY_SERVICE_URL + f"/instances/{instance_name}"
+async def get_instance(instance_name: str, request: Request):
+    return await cached_get(
+        request,
+        "/instances/{instance_name}",
+        f"/instances/{instance_name}",
+        "instances",
+        instance_name,
+    )
+
+
+@app.get("/stats")
+async def get_registry_stats(request: Request):
+    return await cached_get(request, "/stats", "/stats", "stats")
+
+
+@app.get("/phases/stats")
+async def get_phase_stats(request: Request):
+    return await forward_request_to_get("data_registry", with_query("/phases/stats", request))
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+@app.get("/breaker/stats")
+async def get_breaker_stats():
+    return {
+        "breakers": {name: breaker.stats() for name, breaker in breakers.items()},
+        "hedging": {name: stats.stats() for name, stats in hedge_stats.items()},
+    }
+
+
+def with_query(path, request):
+    query = request.url.query
+    return f"{path}?{query}" if query else path
+
+
+async def cached_get(request: Request, route: str, path: str, collection: str, name: str = None):
+    cached = response_cache.get(path)
+    if cached is not None:
+        value, needs_refresh = cached
+        if needs_refresh and path not in refreshing:
+            refreshing.add(path)
+            spawn(refresh_cached(route, path, collection, name))
+    else:
+        value = await fetch_into_cache(route, path, collection, name)
+    return not_modified_for(request, value) or value
+
+
+def not_modified_for(request, value):
+    # Answer the client's own If-None-Match from the cached ETag
+    etag = value.headers.get("etag")
+    if_none_match = request.headers.get("if-none-match")
+    if etag is None or if_none_match is None:
+        return None
+    if etag not in [tag.strip() for tag in if_none_match.split(",")]:
+        return None
+    return Response(status_code=304, headers={
+        name: value.headers[name] for name in ("etag", "last-modified", "cache-control")
+        if name in value.headers
+    })
+
+
+async def fetch_into_cache(route, path, collection, name):
+    generation = response_cache.generation(collection)
+    # An expired entry is revalidated instead of refetched
+    expired = response_cache.peek(path)
+    headers = {}
+    if expired is not None and "etag" in expired.headers:
+        headers["If-None-Match"] = expired.headers["etag"]
+    value = await forward_request_to_get("data_registry", path, headers)
+    if value.status_code == 304:
+        renewed = response_cache.renew(path, route, generation)
+        if renewed is not None:
+            return renewed
+        # Invalidated meanwhile: fetch the body unconditionally
+        value = await forward_request_to_get("data_registry", path)
+    response_cache.set(path, value, route, collection, name, generation)
+    return value
+
+
+async def refresh_cached(route, path, collection, name):
+    try:
+        await fetch_into_cache(route, path, collection, name)
+    except HTTPException as exc:
+        logger.error(f"Background refresh of {path} failed: {exc.detail}")
+    finally:
+        refreshing.discard(path)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/events/status")
+async def get_status_events(request: Request, entity: str = None):
+    return StreamingResponse(
+        status_events(request, entity),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def status_events(request, entity):
+    # Relays module/instance status transitions; ?entity=module|instance filters
+    queue = subscribe()
+    try:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if entity is None or event.get("entity") == entity:
+                yield sse_event("status", event)
+    finally:
+        unsubscribe(queue)
+
+
+async def job_events(job):
+    yield sse_event("status", job.to_dict())
+    while not job.done.is_set():
+        try:
+            await asyncio.wait_for(job.done.wait(), SSE_HEARTBEAT)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+    yield sse_event("result", job.to_dict())
+
+
+def wants_job(request: Request):
+    # Clients opt in with "Prefer: respond-async" (RFC 7240) or ?async=true
+    prefer = request.headers.get("prefer", "").lower()
+    return "respond-async" in prefer or request.query_params.get("async") == "true"
+
+
+async def submit_job(request: Request, upstream: str, path: str):
+    body = await request.body()
+    headers = filter_headers(request.headers)
+    headers.pop("prefer", None)
+    job = job_store.create()
+    spawn(run_job(job, upstream, path, body, headers))
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events",
+        },
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+async def run_job(job, upstream, path, body, headers):
+    try:
+        started = await admit(upstream)
+    except Overloaded as exc:
+        job_store.finish(job, "failed", exc.status_code, {"detail": exc.detail})
+        return
+    try:
+        response = await get_client(upstream).post(path, content=body, headers=headers)
+    except httpx.RequestError as exc:
+        complete(upstream, started, True)
+        logger.error(f"Communication error with service: {str(exc)}")
+        job_store.finish(
+            job, "failed", 503, {"detail": f"Error communicating with the service: {str(exc)}"}
+        )
+        return
+    except Exception as exc:
+        complete(upstream, started, True)
+        logger.error(f"General error: {str(exc)}")
+        job_store.finish(job, "failed", 500, {"detail": str(exc)})
+        return
+    complete(upstream, started, response.status_code >= 500)
+    try:
+        result = response.json()
+    except ValueError:
+        result = response.text
+    status = "done" if response.status_code < 400 else "failed"
+    job_store.finish(job, status, response.status_code, result)
+
+
+async def forward_post(request: Request, upstream: str, path: str):
+    if wants_job(request):
+        return await submit_job(request, upstream, path)
+    if STREAMING_PROXY:
+        return await stream_request(request, upstream, path)
+    return await forward_request(request, upstream, path)
+
+
+def filter_headers(headers):
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+
+
+async def stream_request(request: Request, upstream: str, path: str):
+    client = get_client(upstream)
+    upstream_request = client.build_request(
+        request.method,
+        path,
+        params=request.query_params,
+        headers=filter_headers(request.headers),
+        content=request.stream(),
+    )
+    started = await admit(upstream)
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.RequestError as exc:
+        complete(upstream, started, True)
+        logger.error(f"Communication error with service: {str(exc)}")
+        raise HTTPException(
+            status_code=503, detail=f"Error communicating with the service: {str(exc)}"
+        )
+    except BaseException:
+        complete(upstream, started, True)
+        raise
+    # Raw bytes keep any content-encoding intact, so headers stay valid as-is.
+    # The concurrency slot is held until the reply has been fully relayed.
+    relay = UpstreamRelay(response, upstream, started)
+    return RelayResponse(
+        relay,
+        status_code=response.status_code,
+        headers=filter_headers(response.headers),
     )
 
 
-async def forward_request(request: Request, url: str):
+class UpstreamRelay:
+    """Relays one streamed upstream reply and settles its call exactly once.
+
+    finish() closes the httpx response and hands the admission slot back,
+    whichever way the relay ends: fully sent, failed mid-body (e.g. the
+    upstream reset the connection), or abandoned by the client.
+    """
+
+    def __init__(self, response, upstream, started):
+        self.response = response
+        self.upstream = upstream
+        self.started = started
+        self.finished = False
+
+    async def body(self):
+        failed = self.response.status_code >= 500
+        try:
+            async for chunk in self.response.aiter_raw():
+                yield chunk
+        except Exception:
+            failed = True
+            raise
+        finally:
+            await self.finish(failed)
+
+    async def finish(self, failed):
+        if self.finished:
+            return
+        self.finished = True
+        try:
+            await self.response.aclose()
+        finally:
+            complete(self.upstream, self.started, failed)
+
+
+class RelayResponse(StreamingResponse):
+    # Starlette runs no background task when the body raises, and a client
+    # gone before the first chunk leaves the body generator unstarted, so
+    # its finally never runs; settling here covers both
+    def __init__(self, relay, **kwargs):
+        super().__init__(relay.body(), **kwargs)
+        self.relay = relay
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.relay.finish(False)
+
+
+async def forward_request(request: Request, upstream: str, path: str):
     # try:
     data = await request.json()
-    async with httpx.AsyncClient(timeout=100.0) as client:
-         response = await client.post(url, json=data)
-         return handle_response(response)
+    started = await admit(upstream)
+    failed = True
+    try:
+        response = await get_client(upstream).post(path, json=data)
+        failed = response.status_code >= 500
+    finally:
+        complete(upstream, started, failed)
+    return handle_response(response)
     # except httpx.RequestError as exc:
     #     logger.error(f"Communication error with service: {str(exc)}")
     #     raise HTTPException(
@@ -70,11 +502,16 @@ async def forward_request(request: Request, url: str):
     #     raise HTTPException(status_code=500, detail=str(exc))
 
 
-async def forward_request_to_get(url: str):
+async def forward_request_to_get(upstream: str, path: str, headers=None):
+    started = await admit(upstream)
+    failed = True
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            return handle_response(response)
+        response = await hedged_get(upstream, path, headers)
+        failed = response.status_code >= 500
+        return handle_get_response(response)
+    except HTTPException:
+        # Upstream 4xx statuses (e.g. a registry 404) pass through unchanged
+        raise
     except httpx.RequestError as exc:
         logger.error(f"Communication error with service: {str(exc)}")
         raise HTTPException(
@@ -83,6 +520,24 @@ async def forward_request_to_get(url: str):
     except Exception as exc:
         logger.error(f"General error: {str(exc)}")
         raise HTTPException(status_code=500, detail=str(exc))
+    finally:
+        complete(upstream, started, failed)
+
+
+def handle_get_response(response):
+    # Relay the upstream JSON bytes as-is rather than decoding and re-encoding
+    if response.status_code in (200, 304):
+        headers = {
+            name: response.headers[name]
+            for name in PASSTHROUGH_HEADERS
+            if name in response.headers
+        }
+        if response.status_code == 304:
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=response.content, media_type="application/json", headers=headers
+        )
+    return handle_response(response)
 
 
 def handle_response(response):
@@ -0,0 +1,80 @@
+import os
+import httpx
+import logging
+import itertools
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+# Connection pool settings shared by every upstream client
+MAX_CONNECTIONS = env_int("GATEWAY_MAX_CONNECTIONS", 100)
+MAX_KEEPALIVE_CONNECTIONS = env_int("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", 20)
+KEEPALIVE_EXPIRY = env_float("GATEWAY_KEEPALIVE_EXPIRY", 30.0)
+CONNECT_TIMEOUT = env_float("GATEWAY_CONNECT_TIMEOUT", 5.0)
+HTTP2 = env_bool("GATEWAY_HTTP2", False)
+
+# Base URL and read timeout (seconds) for each microservice behind the gateway.
+# Every value can be overridden with GATEWAY_<NAME>_URL / GATEWAY_<NAME>_TIMEOUT;
+# GATEWAY_<NAME>_URL may list several comma-separated replicas.
+UPSTREAMS = {
+    "create_module": ("http://create-module-service:5000", 100.0),
+    "instance_creator": ("http://instance-creator-service:4000", 100.0),
+    "prediction_creator": ("http://prediction-creator-service:8000", 100.0),
+    "data_registry": ("http://data-registry-service:7000", 5.0),
+}
+
+clients = {}
+rotations = {}
+
+
+def build_client(base_url, timeout):
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=HTTP2,
+        timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def open_clients():
+    for name, (base_url, timeout) in UPSTREAMS.items():
+        prefix = f"GATEWAY_{name.upper()}"
+        base_urls = os.environ.get(f"{prefix}_URL", base_url).split(",")
+        timeout = env_float(f"{prefix}_TIMEOUT", timeout)
+        clients[name] = [build_client(url.strip(), timeout) for url in base_urls]
+        rotations[name] = itertools.cycle(clients[name])
+        logger.info(f"Opened client for {name} at {base_urls} (timeout {timeout}s)")
+
+
+async def close_clients():
+    for name, replicas in clients.items():
+        for client in replicas:
+            await client.aclose()
+        logger.info(f"Closed client for {name}")
+    clients.clear()
+    rotations.clear()
+
+
+def get_client(name):
+    # Round-robin across the upstream's replicas
+    return next(rotations[name])
+
+
+def get_replicas(name):
+    return clients[name]
@@ -5,10 +5,16 @@ import asyncio
 import os
 import shutil
 import logging
-from models import SessionLocal, Instance
 import datetime
-import subprocess
-import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from common.db_config import sync_database_url
+from common.git_cache import checked_out_file, checkout_files
+from common.metrics import observe_message, start_metrics_server
+from common.phase_timing import flush_phases_with, timed_phase
+from common.schema import Instance
+from common.stats_rollup import record_transition
+from common.status_events import publish_status_event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,6 +24,11 @@ logger = logging.getLogger(__name__)
 os.environ.setdefault('DOCKER_HOST', 'tcp://docker_host:2375')
 docker_client = docker.from_env()
 
+# Database setup
+SQLALCHEMY_DATABASE_URL = sync_database_url()
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
 def docker_login():
     try:
         logger.info("Logging into Docker registry...")
@@ -41,10 +52,15 @@ async def consume_from_rabbitmq():
                 logger.info("Connected to RabbitMQ. Listening for messages...")
                 async for message in queue:
                     async with message.process():
-                        logger.info(f"Received message: {message.body.decode()}")
-                        data = json.loads(message.body.decode())
-                        await process_instance(data)
-                        message.ack()
+                        with observe_message("instance_queue", message):
+                            logger.info(f"Received message: {message.body.decode()}")
+                            data = json.loads(message.body.decode())
+                            try:
+                                await process_instance(data)
+                            finally:
+                                # One batched insert for all phases of this instance
+                                flush_phases_with(engine)
+                            message.ack()
 
         except Exception as e:
             logger.error("Failed to connect or listen to RabbitMQ, retrying in 10 seconds...", exc_info=True)
@@ -61,21 +77,16 @@ async def process_instance(data):
 
     logger.info(f"Processing instance '{instance_name}' with module '{module_name}'.")
 
-    temp_dir = tempfile.mkdtemp()
-    subprocess.run(['git', 'clone', github_url, temp_dir], check=True)
-    source_file_path = os.path.join(temp_dir, file_name)
-
-    if not os.path.exists(source_file_path):
-        logger.error(f"File {file_name} not found in the cloned repository.")
-        shutil.rmtree(temp_dir)  # Clean up the temporary directory
-        return
-
-
     image_name = f"alextno/{module_name}"
     input_file_path = "/shared_data/input.json"
-    shutil.copy(source_file_path, input_file_path)
+    with timed_phase("instance", instance_name, "clone"):
+        with checkout_files(github_url, [file_name]) as temp_dir:
+            source_file_path = checked_out_file(temp_dir, file_name)
+            if source_file_path is None or not os.path.exists(source_file_path):
+                logger.error(f"File {file_name} not found in the cloned repository.")
+                return
+            shutil.copy(source_file_path, input_file_path)
     logger.info(f"File {file_name} copied to '{input_file_path}' as 'input.json'.")
-    shutil.rmtree(temp_dir)
     
     prediction_script_dir = f"/shared_data/{module_name}"
     prediction_script_path = os.path.join(prediction_script_dir, 'prediction_script.py')
@@ -91,13 +102,15 @@ async def process_instance(data):
 
     try:
         logger.info(f"Pulling Docker image: {image_name}")
-        docker_client.images.pull(image_name)
+        with timed_phase("instance", instance_name, "image_pull"):
+            docker_client.images.pull(image_name)
         logger.info("Image pulled successfully.")
 
         volumes = {'/shared_data': {'bind': '/shared_data', 'mode': 'rw'}}
         logger.info(f"Running container using image {image_name}.")
-        container = docker_client.containers.run(image_name, detach=True, volumes=volumes)
-        container.wait()
+        with timed_phase("instance", instance_name, "training_container"):
+            container = docker_client.containers.run(image_name, detach=True, volumes=volumes)
+            container.wait()
         container.remove(force=True)
         logger.info("Container finished execution and removed.")
         
@@ -116,27 +129,34 @@ CMD ["python", "/app/prediction_script.py"]
 
         new_image_name = f"alextno/{instance_name}"
         logger.info(f"Building new Docker image: {new_image_name}")
-        docker_client.images.build(path="/shared_data", tag=new_image_name)
+        with timed_phase("instance", instance_name, "image_build"):
+            docker_client.images.build(path="/shared_data", tag=new_image_name)
         logger.info("New Docker image built successfully.")
 
-        docker_client.images.push(new_image_name)
+        with timed_phase("instance", instance_name, "image_push"):
+            docker_client.images.push(new_image_name)
         logger.info(f"Image {new_image_name} has been successfully pushed to the repository.")
 
         # Update instance status in the database
         db = SessionLocal()
         instance = db.query(Instance).filter(Instance.id == instance_id).first()
         if instance:
+            previous_status = instance.status
             instance.status = "Done"
             instance.completed_at = datetime.datetime.utcnow()
+            record_transition(db, "instance", previous_status, "Done", instance.created_at, instance.completed_at)
             db.commit()
             logger.info(f"Updated instance {instance_id} to 'Done' with completion datetime.")
         db.close()
+        if instance:
+            await publish_status_event("instance", instance_name, status="Done")
 
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}", exc_info=True)
 
 if __name__ == "__main__":
     docker_login()
+    start_metrics_server()
     logger.info("Service starting...")
     loop = asyncio.get_event_loop()
     loop.create_task(consume_from_rabbitmq())